@@ -1,23 +1,29 @@
+from __future__ import annotations
+
 import os
+import csv
+import hashlib
 
 import argparse as ap
 
-from typing import Union, Any
+from typing import TYPE_CHECKING, Union, Any, Iterable
 from operator import sub
-from datetime import datetime
-
-import pandas as pd
-import openpyxl as op
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
 
 from textwrap import dedent
 
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
 
 class PersonalFinancialWallet:
     """
     Приложение командной строки "Персональный финансовый кошелек"
 
     Позволяет вести учет доходов и расходов и сохраняет информацию
-    в файле xlsx
+    в файле parquet, csv или xlsx
     ...
 
     Аттрибуты
@@ -28,25 +34,53 @@ class PersonalFinancialWallet:
         описание приложения для отображения в консоли
     _actions : list
         список команд для приложения
-    _root_dir : str
-        строка с корневой директорией проекта
+    _root_dir : Path
+        путь до корневой директории проекта
+    _db_dir : Path
+        путь до директории с файлами базы данных, может быть переопределен
+        переменной окружения PFW_DB_DIR
+    _db_dir_env : str
+        имя переменной окружения с путем до директории базы данных
+    _backend_env : str
+        имя переменной окружения с форматом файла базы данных по умолчанию
+    _formats : list
+        список поддерживаемых форматов файла базы данных
     _filename : str
-        имя файла для хранения и записи информации
-    columns : list
+        имя файла (без расширения) для хранения и записи информации
+    _export_filename : str
+        имя файла xlsx для экспорта записей
+    _cache_dirname : str
+        имя директории для кэша разобранных файлов xlsx
+    _columns : list
         список наименований для колонок
-    categories : list
+    _categories : list
         список категорий для записей
-    db_path : str
-        строка содержащая полный путь до файла базы данных
+    _col_index : dict
+        номера колонок в файле excel по их наименованиям
+    _date_columns : list
+        список наименований колонок с датами операций
+    _attr_to_col : dict
+        наименования колонок по именам аргументов командной строки
+    _timestamp_columns : list
+        список наименований колонок с временем создания и обновления записи,
+        в файлах csv и parquet хранятся как наносекунды от начала эпохи в UTC
+    _epoch : datetime
+        начало эпохи Unix в UTC
+    db_format : str
+        формат файла базы данных, выбранный пользователем
+    db_path : Path
+        полный путь до файла базы данных
+    _parser : ArgumentParser
+        парсер аргументов командной строки, общий для всех экземпляров
     parser : ArgumentParser
         парсер аргументов командной строки
     """
     _prog_name = 'PFW'
-    _prog_description = '''
+    _prog_description = dedent('''
         Личный Финансовый Кошелек
         ________________________________________________________________
         Приложение командной строки для ведения учета доходов и расходов
-    '''
+    ''')
 
     _balance_table = dedent('''
             __________________________
@@ -58,34 +92,93 @@ class PersonalFinancialWallet:
            | _________________________ 
         ''')
 
-    _actions = ['balance', 'add', 'search', 'modify']
+    _actions = ['balance', 'add', 'search', 'modify', 'export']
 
-    _root_dir = os.getcwd()
+    _db_dir_env = 'PFW_DB_DIR'
+    _backend_env = 'PFW_BACKEND'
 
-    _filename = 'db.xlsx'
+    _formats = ['parquet', 'csv', 'xlsx']
+
+    _filename = 'db'
+    _export_filename = 'export.xlsx'
+    _cache_dirname = '.cache'
 
     _columns = ['Category', 'Amount', 'Date', 'Description', 'Created at', 'Updated at']
+    _col_index = {col_name: i for i, col_name in enumerate(_columns, 1)}
+    _attr_to_col = {'amount': 'Amount', 'category': 'Category', 'date': 'Date', 'description': 'Description'}
+    _date_columns = ['Date']
+    _timestamp_columns = ['Created at', 'Updated at']
+    _epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
     _categories = ['Расход', 'Доход']
 
+    _parser = None
+
     def __init__(self):
-        self.db_path = os.path.join(self._root_dir, f'database\\{self._filename}')
-        self._create_db_if_not_exists()
+        self._root_dir = Path(__file__).resolve().parent.parent
+        self._db_dir = Path(os.environ.get(self._db_dir_env, self._root_dir / 'database')).expanduser()
+        self.db_format = None
+        self.db_path = None
+        self.parser = self._get_parser()
+
+    @classmethod
+    def _get_parser(cls) -> ap.ArgumentParser:
+        """
+        Возвращает парсер аргументов командной строки. Парсер создается
+        один раз за время работы процесса и переиспользуется всеми экземплярами.
+
+        :return: Парсер аргументов командной строки
+        """
+        if cls._parser is None:
+            cls._parser = cls._build_parser()
+        return cls._parser
 
-        self.parser = ap.ArgumentParser(prog=self._prog_name,
-                                        description=dedent(self._prog_description),
-                                        formatter_class=ap.RawDescriptionHelpFormatter)
+    @classmethod
+    def _build_parser(cls) -> ap.ArgumentParser:
+        """
+        Создает парсер аргументов командной строки.
 
-        self.parser.add_argument('action',
-                                 choices=self._actions,
-                                 help='Выполнить операцию одну на выбор - показать баланс,'
-                                      ' добавить редактировать или удалить запись')
-        self.parser.add_argument(
-            '-c', '--cat', nargs='?', choices=self._categories, dest='category', help='Категория операции'
+        :return: Парсер аргументов командной строки
+        """
+        parser = ap.ArgumentParser(prog=cls._prog_name,
+                                   description=cls._prog_description,
+                                   formatter_class=ap.RawDescriptionHelpFormatter)
+
+        parser.add_argument('action',
+                            choices=cls._actions,
+                            help='Выполнить операцию одну на выбор - показать баланс,'
+                                 ' добавить редактировать или удалить запись,'
+                                 ' экспортировать записи в файл xlsx')
+        parser.add_argument(
+            '-c', '--cat', nargs='?', choices=cls._categories, dest='category', help='Категория операции'
         )
-        self.parser.add_argument('-a', '--amount', dest='amount', help='Сумма')
-        self.parser.add_argument('--date', nargs='?', dest='date', help='Дата операции', const=datetime.date)
-        self.parser.add_argument('-d', '--desc', nargs='?', dest='description', help='Детали операции')
-        self.parser.add_argument('-i', '--index', nargs='?', type=int, dest='idx', help='Индекс записи')
+        parser.add_argument('-a', '--amount', type=float, dest='amount', help='Сумма')
+        parser.add_argument('--date', nargs='?', type=cls._parse_date_arg, dest='date',
+                            const=datetime.now().strftime('%Y-%m-%d'),
+                            help='Дата операции в формате ГГГГ-ММ-ДД или ДД.ММ.ГГГГ (по умолчанию сегодня)')
+        parser.add_argument('-d', '--desc', nargs='?', dest='description', help='Детали операции')
+        parser.add_argument('-i', '--index', nargs='?', type=int, dest='idx', help='Индекс записи')
+        parser.add_argument('-f', '--format', choices=cls._formats, dest='format',
+                            help='Формат файла базы данных (по умолчанию значение переменной'
+                                 f' окружения {cls._backend_env} или {cls._formats[0]})')
+        parser.add_argument('-o', '--output', dest='output', help='Путь до файла xlsx для экспорта')
+        return parser
+
+    @staticmethod
+    def _parse_date_arg(value: str) -> str:
+        """
+        Проверяет дату операции, переданную в аргументах командной строки,
+        и приводит ее к формату ГГГГ-ММ-ДД, в котором даты хранятся
+        во всех форматах файла базы данных.
+
+        :param value: Дата в формате ГГГГ-ММ-ДД или ДД.ММ.ГГГГ
+        :return: Дата в формате ГГГГ-ММ-ДД
+        """
+        for date_format in ('%Y-%m-%d', '%d.%m.%Y'):
+            try:
+                return datetime.strptime(value, date_format).strftime('%Y-%m-%d')
+            except ValueError:
+                continue
+        raise ap.ArgumentTypeError(f'некорректная дата {value!r}, используйте формат ГГГГ-ММ-ДД или ДД.ММ.ГГГГ')
 
     def count_balance(self, dataframe: pd.DataFrame) -> tuple[int, int, int]:
         """
@@ -95,38 +188,57 @@ class PersonalFinancialWallet:
         :return: Кортеж с суммой баланса, общей суммой расходов и доходов
         """
         if dataframe.empty:
-            print('\nОшибка: Недостаточно данных для вычисления баланса.'
-                  ' Отсутствуют доходы и расходы.')
-            raise SystemExit(2)
-        income_rows = self._filter_rows(dataframe, {'Category': 'Доход'})
-        outcome_rows = self._filter_rows(dataframe, {'Category': 'Расход'})
-        income = income_rows.Amount.sum() if not income_rows.empty else 0
-        outcome = outcome_rows.Amount.sum() if not outcome_rows.empty else 0
+            self._exit_no_balance_data()
+        sums = dataframe.groupby('Category', sort=False, observed=True)['Amount'].sum()
+        income = sums.get('Доход', 0)
+        outcome = sums.get('Расход', 0)
+        balance = sub(income, outcome)
+        return balance, income, outcome
+
+    def count_csv_balance(self) -> tuple[float, float, float]:
+        """
+        Вычисляет баланс, расходы и доходы по файлу csv средствами
+        стандартной библиотеки, без загрузки pandas.
+
+        :return: Кортеж с суммой баланса, общей суммой расходов и доходов
+        """
+        sums = dict.fromkeys(self._categories, 0)
+        rows_count = 0
+        with open(self.db_path, newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                rows_count += 1
+                if row['Category'] in sums and row['Amount']:
+                    sums[row['Category']] += float(row['Amount'])
+        if not rows_count:
+            self._exit_no_balance_data()
+        income = sums['Доход']
+        outcome = sums['Расход']
         balance = sub(income, outcome)
         return balance, income, outcome
 
-    def add_record(self, col_values: dict[str, Any]) -> None:
+    def add_record(self, col_values: dict[str, Any], now: datetime = None) -> None:
         """
         Добавляет новую запись в таблицу excel.
 
         :param col_values: Словарь со значениями ячеек,
                            переданных пользователем в аргументах командной строки
+        :param now: Время создания записи в UTC (По умолчанию текущее время)
         :return: None
         """
-        upd_datetime = datetime.now()
-        col_values.update({'Created at': upd_datetime})
-        self._save_to_excel(col_values)
+        col_values.update({'Created at': now or datetime.now(timezone.utc)})
+        self._append_row(col_values)
 
-    def modify_record(self, update_values: dict[str, Any], index: int) -> None:
+    def modify_record(self, update_values: dict[str, Any], index: int, now: datetime = None) -> None:
         """
         Обновляет запись в файле excel.
 
         :param update_values: Словарь с новыми значениями ячеек
         :param index: Индекс записи для обновления
+        :param now: Время обновления записи в UTC (По умолчанию текущее время)
         :return: None
         """
-        update_values['Updated at'] = datetime.now()
-        self._save_to_excel(update_values, index)
+        update_values['Updated at'] = now or datetime.now(timezone.utc)
+        self._update_row(update_values, index)
 
     def search_record(self, dataframe: pd.DataFrame, conditions: dict[str, str]) -> int:
         """
@@ -139,10 +251,41 @@ class PersonalFinancialWallet:
         :param conditions: Словарь со значениями ячеек для поиска
         :return: Количество найденных строк
         """
+        if dataframe.empty:
+            return 0
         self._filter_rows(dataframe, conditions, inplace=True)
         rows_count, _ = dataframe.shape
         return rows_count
 
+    def search_many(self, dataframe: pd.DataFrame, conditions_list: list[dict[str, str]]) -> list[pd.DataFrame]:
+        """
+        Найти записи сразу по нескольким наборам условий. Маска для каждой
+        пары колонка-значение вычисляется один раз и переиспользуется
+        всеми наборами условий, в которых она встречается.
+
+        :param dataframe: датафрейм с информацией о расходах и доходах
+        :param conditions_list: Список словарей со значениями ячеек для поиска
+        :return: Список отфильтрованных дата фреймов в порядке наборов условий
+        """
+        if dataframe.empty:
+            return [dataframe for _ in conditions_list]
+        masks = {}
+        return [dataframe.loc[self._build_mask(dataframe, conditions, masks)] for conditions in conditions_list]
+
+    def export_records(self, dataframe: pd.DataFrame, path: Union[str, Path]) -> int:
+        """
+        Экспортирует записи в файл excel.
+
+        :param dataframe: Дата фрейм с информацией о расходах и доходах
+        :param path: Путь до файла xlsx
+        :return: Количество экспортированных строк
+        """
+        values = dataframe.reindex(columns=self._columns).astype(object)
+        rows = values.where(values.notna(), None).itertuples(index=False, name=None)
+        self._write_excel(path, rows)
+        rows_count, _ = dataframe.shape
+        return rows_count
+
     def start(self) -> None:
         """
         Запускает парсинг аргументов командной строки, вызывает
@@ -152,66 +295,544 @@ class PersonalFinancialWallet:
         :return: None
         """
         args = self.parser.parse_args()
+        now = datetime.now(timezone.utc)
+        db_format = args.format or os.environ.get(self._backend_env) or self._formats[0]
+        if db_format not in self._formats:
+            self.parser.error(f'недопустимое значение переменной окружения {self._backend_env}:'
+                              f' {db_format!r} (выберите из {", ".join(self._formats)})')
+        self._set_db_format(db_format)
+        if args.action == 'modify':
+            self._check_record_index(args.idx)
         _col_values = self.cli_args_to_dict(args)
         if args.action == 'balance':
-            dataframe = self._load_dataframe_from_excel()
-            print(self._balance_table % self.count_balance(dataframe))
+            if self.db_format == 'csv':
+                totals = self.count_csv_balance()
+            else:
+                totals = self.count_balance(self._load_dataframe(columns=['Category', 'Amount']))
+            print(self._balance_table % totals)
         elif args.action == 'add':
-            self.add_record(_col_values)
+            self.add_record(_col_values, now)
             print(f'\nДобавлена новая запись:\n\n{self.cell_values_to_string(_col_values.values())}')
         elif args.action == 'search':
-            dataframe = self._load_dataframe_from_excel()
+            dataframe = self._load_dataframe()
             rows_count = self.search_record(dataframe, _col_values)
             print(f'\nНайдено {rows_count} записей\n_________________\n')
             if rows_count > 0:
                 print(dataframe)
+        elif args.action == 'export':
+            path = args.output or self._db_dir / self._export_filename
+            rows_count = self.export_records(self._load_dataframe(), path)
+            print(f'\nЭкспортировано {rows_count} записей в файл {path}')
         else:
-            self.modify_record(_col_values, args.idx)
+            self.modify_record(_col_values, args.idx, now)
             print(f'\nЗапись обновлена:\n{self.cell_values_to_string(_col_values.values())}')
 
+    def _check_record_index(self, index: int) -> None:
+        """
+        Проверяет, что индекс записи для редактирования передан и указывает
+        на существующую запись, иначе завершает работу с ошибкой использования.
+
+        :param index: Индекс записи из аргументов командной строки
+        :return: None
+        """
+        if index is None:
+            self.parser.error('для команды modify необходимо указать индекс записи -i/--index')
+        records_count = self._count_records()
+        if not 0 <= index < records_count:
+            self.parser.error(f'запись с индексом {index} не найдена, в базе данных {records_count} записей')
+
+    def _count_records(self) -> int:
+        """
+        Возвращает количество записей в файле базы данных в выбранном формате.
+
+        :return: Количество записей
+        """
+        if self.db_format == 'parquet':
+            import pyarrow.parquet as pq
+
+            return pq.ParquetFile(self.db_path).metadata.num_rows
+        if self.db_format == 'csv':
+            with open(self.db_path, newline='', encoding='utf-8') as file:
+                return sum(1 for _ in csv.reader(file)) - 1
+        return len(self._load_dataframe_from_excel(columns=['Category']))
+
+    def _set_db_format(self, db_format: str) -> None:
+        """
+        Устанавливает формат и путь до файла базы данных и создает его,
+        если он не создан.
+
+        :param db_format: Формат файла базы данных
+        :return: None
+        """
+        self.db_format = db_format
+        self.db_path = self._get_db_path(db_format)
+        self._create_db_if_not_exists()
+
+    def _get_db_path(self, db_format: str) -> Path:
+        """
+        Возвращает полный путь до файла базы данных в заданном формате.
+
+        :param db_format: Формат файла базы данных
+        :return: Путь до файла
+        """
+        return self._db_dir / f'{self._filename}.{db_format}'
+
     def _create_db_if_not_exists(self) -> None:
         """
-        Создает файл excel в директории ./database/ если он не создан.
+        Создает файл базы данных в директории ./database/ если он не создан.
+        Если выбран формат parquet и рядом лежит файл xlsx, данные из него
+        переносятся в новый файл.
 
         :return: None
         """
-        db_dir_name = os.path.dirname(self.db_path)
-        if not os.path.isdir(db_dir_name):
-            os.mkdir(db_dir_name)
-        if not os.path.isfile(self.db_path):
+        self._db_dir.mkdir(parents=True, exist_ok=True)
+        if self.db_path.exists():
+            return
+        if self.db_format == 'parquet':
+            excel_path = self._get_db_path('xlsx')
+            if excel_path.exists():
+                try:
+                    self._migrate_from_excel(excel_path)
+                except (ValueError, TypeError) as error:
+                    self.db_path.unlink(missing_ok=True)
+                    self.parser.error(f'не удалось перенести записи из файла {excel_path} в parquet: {error}.'
+                                      ' Исправьте файл или используйте --format xlsx')
+            else:
+                import pandas as pd
+
+                self._write_parquet(pd.DataFrame(columns=self._columns))
+        elif self.db_format == 'csv':
+            with open(self.db_path, 'w', newline='', encoding='utf-8') as file:
+                csv.writer(file).writerow(self._columns)
+        else:
+            import openpyxl as op
+
             wb = op.Workbook()
             sheet = wb.active
             sheet.title = 'Main'
             sheet.append(self._columns)
             wb.save(self.db_path)
 
-    def _load_dataframe_from_excel(self) -> pd.DataFrame:
+    def _migrate_from_excel(self, excel_path: Path) -> None:
+        """
+        Однократно переносит записи из файла excel в файл parquet.
+
+        :param excel_path: Путь до существующего файла excel
+        :return: None
+        """
+        self._write_parquet(self._load_dataframe_from_excel(excel_path))
+
+    def _load_dataframe(self, columns: list[str] = None) -> pd.DataFrame:
+        """
+        Загружает дата фрейм из файла базы данных в выбранном формате.
+        Колонки приводятся к компактным типам: категории - к типу category,
+        чтобы сравнения выполнялись по целочисленным кодам, описание - к строкам
+        pyarrow, сумма - к числу.
+
+        :param columns: Список колонок для загрузки (По умолчанию все колонки)
+        :return: Дата фрейм с данными о расходах и доходах
+        """
+        import pandas as pd
+
+        if self.db_format == 'parquet':
+            dataframe = self._load_dataframe_from_parquet(columns)
+        elif self.db_format == 'csv':
+            dataframe = self._load_dataframe_from_csv(columns)
+        else:
+            dataframe = self._load_dataframe_from_excel(columns=columns)
+        dtypes = {
+            'Category': pd.CategoricalDtype(self._categories),
+            'Description': 'string[pyarrow]',
+            'Amount': 'float64',
+        }
+        dataframe = dataframe.astype({col_name: dtype for col_name, dtype in dtypes.items() if col_name in dataframe})
+        for col_name in self._timestamp_columns:
+            if col_name in dataframe:
+                dataframe[col_name] = self._to_utc(dataframe[col_name])
+        return dataframe
+
+    def _append_row(self, values: dict[str, Any]) -> None:
+        """
+        Добавляет новую строку в конец файла базы данных в выбранном формате.
+
+        :param values: Словарь со значениями ячеек
+        :return: None
+        """
+        if self.db_format == 'parquet':
+            self._save_to_parquet(values)
+        elif self.db_format == 'csv':
+            self._append_to_csv(values)
+        else:
+            self._append_to_excel(values)
+
+    def _update_row(self, values: dict[str, Any], index: int) -> None:
+        """
+        Обновляет строку в файле базы данных в выбранном формате.
+
+        :param values: Словарь с новыми значениями ячеек
+        :param index: Индекс записи
+        :return: None
+        """
+        if self.db_format == 'parquet':
+            self._save_to_parquet(values, index)
+        elif self.db_format == 'csv':
+            self._update_csv_row(values, index)
+        else:
+            self._update_excel_row(values, index)
+
+    def _load_dataframe_from_excel(self, path: Union[str, Path] = None, columns: list[str] = None) -> pd.DataFrame:
         """
         Загружает дата фрейм из файла excel в директории ./database/
 
-        :param path:
+        Файл разбирается движком calamine, который написан на Rust и
+        работает значительно быстрее openpyxl. Дата фрейм со всеми колонками
+        сохраняется в кэш ./database/.cache/ в формате parquet по хэшу
+        содержимого файла, и при повторном чтении неизменного файла
+        загружается из кэша.
+
+        :param path: Путь до файла excel (По умолчанию путь до файла базы данных)
+        :param columns: Список колонок для загрузки (По умолчанию все колонки)
         :return: Дата фрейм с данными о расходах и доходах из файла excel
         """
-        return pd.read_excel(self.db_path, date_format='%Y-%m-%d', parse_dates=['Date'])
+        import pandas as pd
+
+        path = path or self.db_path
+        cache_path = self._get_cache_path(path)
+        if os.path.isfile(cache_path):
+            return pd.read_parquet(cache_path, columns=columns)
+        dataframe = pd.read_excel(path, sheet_name='Main', engine='calamine', usecols=columns)
+        dataframe = self._normalize_excel_columns(dataframe.reindex(columns=columns or self._columns))
+        if columns is None:
+            self._write_cache(dataframe, cache_path, path)
+        return dataframe
+
+    @classmethod
+    def _normalize_excel_columns(cls, dataframe: pd.DataFrame) -> pd.DataFrame:
+        """
+        Приводит каждую колонку дата фрейма из файла excel к одному типу значений,
+        чтобы его можно было сохранить в кэш parquet. Текстовые колонки приводятся
+        к строкам, сумма и время - к числу и datetime, а если в файле, измененном
+        вручную, встречаются значения, которые не удается разобрать, - тоже к строкам.
 
-    def _save_to_excel(self, values: dict[str, Any], index: int = None) -> None:
+        :param dataframe: Дата фрейм с данными из файла excel
+        :return: Дата фрейм с колонками одного типа
         """
-        Сохраняет переданные значения в файл excel.
+        import pandas as pd
+
+        for col_name in dataframe.columns:
+            if col_name in cls._date_columns:
+                dataframe[col_name] = cls._parse_dates(dataframe[col_name])
+                continue
+            try:
+                if col_name == 'Amount':
+                    dataframe[col_name] = pd.to_numeric(dataframe[col_name]).astype('float64')
+                elif col_name in cls._timestamp_columns:
+                    dataframe[col_name] = pd.to_datetime(dataframe[col_name])
+                else:
+                    dataframe[col_name] = cls._to_strings(dataframe[col_name])
+            except (ValueError, TypeError):
+                dataframe[col_name] = cls._to_strings(dataframe[col_name])
+        return dataframe
+
+    def _get_cache_path(self, path: Union[str, Path]) -> str:
+        """
+        Возвращает путь до файла кэша для файла excel по хэшу его содержимого.
+
+        :param path: Путь до файла excel
+        :return: Строка с путем до файла кэша
+        """
+        with open(path, 'rb') as file:
+            file_hash = hashlib.blake2b(file.read(), digest_size=16).hexdigest()
+        return os.path.join(os.path.dirname(path), self._cache_dirname, f'{file_hash}.parquet')
+
+    @staticmethod
+    def _write_cache(dataframe: pd.DataFrame, cache_path: str, path: Union[str, Path]) -> None:
+        """
+        Сохраняет дата фрейм в файл кэша и удаляет записи кэша,
+        созданные до последнего изменения файла excel.
+
+        :param dataframe: Дата фрейм с данными из файла excel
+        :param cache_path: Путь до файла кэша
+        :param path: Путь до файла excel
+        :return: None
+        """
+        cache_dir = os.path.dirname(cache_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        dataframe.to_parquet(cache_path, index=False)
+        modified_at = os.path.getmtime(path)
+        for entry in os.scandir(cache_dir):
+            if entry.is_file() and entry.stat().st_mtime < modified_at:
+                os.remove(entry.path)
+
+    def _load_dataframe_from_csv(self, columns: list[str] = None) -> pd.DataFrame:
+        """
+        Загружает дата фрейм из файла csv в директории ./database/
+        Даты разбираются только в загружаемых колонках, время создания и
+        обновления записи преобразуется из наносекунд от начала эпохи.
+
+        :param columns: Список колонок для загрузки (По умолчанию все колонки)
+        :return: Дата фрейм с данными о расходах и доходах из файла csv
+        """
+        import pandas as pd
+
+        parse_dates = [col_name for col_name in self._date_columns if columns is None or col_name in columns]
+        dtype = {col_name: 'Int64' for col_name in self._timestamp_columns}
+        dataframe = pd.read_csv(self.db_path, encoding='utf-8', usecols=columns, parse_dates=parse_dates, dtype=dtype)
+        for col_name in self._timestamp_columns:
+            if col_name in dataframe:
+                dataframe[col_name] = pd.to_datetime(dataframe[col_name], unit='ns', utc=True)
+        return dataframe
+
+    def _load_dataframe_from_parquet(self, columns: list[str] = None) -> pd.DataFrame:
+        """
+        Загружает дата фрейм из файла parquet в директории ./database/
+
+        :param columns: Список колонок для загрузки (По умолчанию все колонки)
+        :return: Дата фрейм с данными о расходах и доходах из файла parquet
+        """
+        import pandas as pd
+
+        return pd.read_parquet(self.db_path, columns=columns)
+
+    def _update_excel_row(self, values: dict[str, Any], index: int) -> None:
+        """
+        Сохраняет переданные значения в строку файла excel.
 
         :param values: Словарь со значениями ячеек
-        :param index: Индекс записи (По умолчанию равен None)
+        :param index: Индекс записи
         :return: None
         """
-        col_indexes = {i[1]: i[0] for i in enumerate(self._columns, 1)}
+        import openpyxl as op
+
         workbook = op.load_workbook(self.db_path)
         sheet = workbook['Main']
-        index = (sheet.max_row + 1) if index is None else (index + 2)
+        row = index + 2
         for col_name, value in values.items():
-            sheet.cell(row=index, column=col_indexes[col_name]).value = value
+            sheet.cell(row=row, column=self._col_index[col_name]).value = self._to_excel_value(value)
         workbook.save(self.db_path)
 
+    def _append_to_excel(self, values: dict[str, Any]) -> None:
+        """
+        Перезаписывает файл excel, добавляя в конец новую строку.
+
+        Существующие строки читаются в режиме только для чтения и
+        потоком записываются в новую книгу в режиме только для записи,
+        что намного быстрее полной загрузки книги.
+
+        :param values: Словарь со значениями ячеек новой строки
+        :return: None
+        """
+        import openpyxl as op
+
+        source = op.load_workbook(self.db_path, read_only=True)
+        rows = list(source['Main'].iter_rows(min_row=2, values_only=True))
+        source.close()
+        rows.append(tuple(values.get(col_name) for col_name in self._columns))
+        self._write_excel(self.db_path, rows)
+
+    def _write_excel(self, path: Union[str, Path], rows: Iterable[tuple]) -> None:
+        """
+        Записывает строки в новый файл excel в режиме только для записи.
+
+        :param path: Путь до файла xlsx
+        :param rows: Итерируемый объект со значениями ячеек строк без заголовка
+        :return: None
+        """
+        import openpyxl as op
+
+        workbook = op.Workbook(write_only=True)
+        sheet = workbook.create_sheet('Main')
+        sheet.append(self._columns)
+        for row in rows:
+            sheet.append([self._to_excel_value(value) for value in row])
+        workbook.save(path)
+
+    def _append_to_csv(self, values: dict[str, Any]) -> None:
+        """
+        Дописывает новую строку в конец файла csv без чтения существующих записей.
+
+        :param values: Словарь со значениями ячеек
+        :return: None
+        """
+        values = self._to_csv_values(values)
+        with open(self.db_path, 'a', newline='', encoding='utf-8') as file:
+            csv.writer(file).writerow([values.get(col_name) for col_name in self._columns])
+
+    def _update_csv_row(self, values: dict[str, Any], index: int) -> None:
+        """
+        Сохраняет переданные значения в строку файла csv. Файл целиком
+        читается модулем csv, в нем заменяется одна строка, и он записывается
+        обратно без использования pandas.
+
+        :param values: Словарь со значениями ячеек
+        :param index: Индекс записи
+        :return: None
+        """
+        with open(self.db_path, newline='', encoding='utf-8') as file:
+            header, *rows = csv.reader(file)
+        row = rows[index]
+        for col_name, value in self._to_csv_values(values).items():
+            row[header.index(col_name)] = value
+        with open(self.db_path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+    @classmethod
+    def _to_csv_values(cls, values: dict[str, Any]) -> dict[str, Any]:
+        """
+        Преобразует время создания и обновления записи в наносекунды
+        от начала эпохи для записи в файл csv.
+
+        :param values: Словарь со значениями ячеек
+        :return: Словарь со значениями ячеек для записи в файл csv
+        """
+        return {
+            col_name: cls._to_epoch_ns(value) if col_name in cls._timestamp_columns else value
+            for col_name, value in values.items()
+        }
+
+    @classmethod
+    def _to_epoch_ns(cls, value: datetime) -> int:
+        """
+        Преобразует время в количество наносекунд от начала эпохи.
+
+        :param value: Время с часовым поясом
+        :return: Количество наносекунд от начала эпохи
+        """
+        return (value - cls._epoch) // timedelta(microseconds=1) * 1000
+
     @staticmethod
-    def _filter_rows(dataframe: pd.DataFrame,
+    def _to_excel_value(value: Any) -> Any:
+        """
+        Приводит время с часовым поясом к локальному времени без часового пояса,
+        так как excel не поддерживает часовые пояса. В таком же виде время
+        записывалось в файл excel и раньше.
+
+        :param value: Значение ячейки
+        :return: Значение ячейки для записи в файл excel
+        """
+        if isinstance(value, datetime) and value.tzinfo is not None:
+            if hasattr(value, 'to_pydatetime'):
+                # pandas.Timestamp.astimezone требует явно указать часовой пояс
+                value = value.to_pydatetime()
+            return value.astimezone().replace(tzinfo=None)
+        return value
+
+    @staticmethod
+    def _to_utc(timestamps: pd.Series) -> pd.Series:
+        """
+        Приводит время создания и обновления записи к datetime в UTC.
+        Время без часового пояса (из файлов excel и старых записей)
+        считается локальным временем пользователя.
+
+        :param timestamps: Колонка со временем
+        :return: Колонка со временем в UTC
+        """
+        import pandas as pd
+
+        if isinstance(timestamps.dtype, pd.DatetimeTZDtype):
+            return timestamps.dt.tz_convert('UTC')
+        localized = timestamps.astype(object).map(
+            lambda value: pd.Timestamp(value).to_pydatetime().astimezone(timezone.utc)
+            if isinstance(value, datetime) else value,
+            na_action='ignore'
+        )
+        return pd.to_datetime(localized, utc=True)
+
+    def _save_to_parquet(self, values: dict[str, Any], index: int = None) -> None:
+        """
+        Сохраняет переданные значения в файл parquet.
+
+        :param values: Словарь со значениями ячеек
+        :param index: Индекс записи (По умолчанию равен None)
+        :return: None
+        """
+        import pandas as pd
+
+        dataframe = self._load_dataframe_from_parquet()
+        row = self._cast_columns(pd.DataFrame([values]))
+        if index is None:
+            dataframe = pd.concat([dataframe, row], ignore_index=True)
+        else:
+            # Колонки приводятся к типам заново при записи, поэтому значения
+            # присваиваются без проверки типа исходной колонки
+            dataframe = dataframe.astype(object)
+            dataframe.iloc[index, dataframe.columns.get_indexer(list(values))] = row.iloc[0].tolist()
+        self._write_parquet(dataframe)
+
+    def _write_parquet(self, dataframe: pd.DataFrame) -> None:
+        """
+        Приводит колонки дата фрейма к нужным типам и записывает его в файл parquet.
+
+        :param dataframe: Дата фрейм с данными о расходах и доходах
+        :return: None
+        """
+        dataframe = self._cast_columns(dataframe.reindex(columns=self._columns))
+        dataframe.to_parquet(self.db_path, index=False)
+
+    @classmethod
+    def _cast_columns(cls, dataframe: pd.DataFrame) -> pd.DataFrame:
+        """
+        Приводит значения колонок к типам, с которыми они хранятся в файле parquet:
+        сумма - к числу, даты - к datetime, время создания и обновления записи -
+        к datetime в UTC, остальные - к строкам.
+
+        :param dataframe: Дата фрейм с данными о расходах и доходах
+        :return: Дата фрейм с приведенными типами колонок
+        """
+        import pandas as pd
+
+        for col_name in dataframe.columns:
+            if col_name == 'Amount':
+                dataframe[col_name] = pd.to_numeric(dataframe[col_name]).astype('float64')
+            elif col_name in cls._date_columns:
+                dataframe[col_name] = cls._parse_dates(dataframe[col_name])
+            elif col_name in cls._timestamp_columns:
+                dataframe[col_name] = cls._to_utc(dataframe[col_name]).astype('datetime64[ns, UTC]')
+            else:
+                dataframe[col_name] = cls._to_strings(dataframe[col_name])
+        return dataframe
+
+    @staticmethod
+    def _to_strings(values: pd.Series) -> pd.Series:
+        """
+        Приводит непустые значения колонки к строкам. В файле excel, измененном
+        вручную, в текстовой колонке могут оказаться числа или даты, а parquet
+        не сохраняет колонки со значениями разных типов.
+
+        :param values: Колонка со значениями
+        :return: Колонка со строками и None на месте пустых значений
+        """
+        strings = values.map(
+            lambda value: str(int(value)) if isinstance(value, float) and value.is_integer() else str(value),
+            na_action='ignore'
+        ).astype(object)
+        return strings.where(strings.notna(), None)
+
+    @staticmethod
+    def _parse_dates(dates: pd.Series) -> pd.Series:
+        """
+        Разбирает даты операций в формате ГГГГ-ММ-ДД. Если в колонке
+        встречается дата в другом формате (такие могли сохраниться в старых
+        файлах), колонка остается строковой, а даты приводятся к строкам
+        ГГГГ-ММ-ДД, чтобы не терять исходные значения.
+
+        :param dates: Колонка с датами операций
+        :return: Колонка с разобранными датами или строками
+        """
+        import pandas as pd
+
+        try:
+            return pd.to_datetime(dates, format='%Y-%m-%d').astype('datetime64[ns]')
+        except (ValueError, TypeError):
+            strings = dates.map(lambda value: value.strftime('%Y-%m-%d') if isinstance(value, datetime) else str(value),
+                                na_action='ignore').astype(object)
+            return strings.where(strings.notna(), None)
+
+    @classmethod
+    def _filter_rows(cls,
+                     dataframe: pd.DataFrame,
                      conditions: dict[str, str],
                      inplace: bool = False) -> Union[pd.DataFrame, None]:
         """
@@ -223,24 +844,60 @@ class PersonalFinancialWallet:
                         или менять существующий. По умолчанию равен False
         :return: Отфильтрованный дата фрейм или None, если записи не найдены
         """
-        expr = ' & '.join([f'{item[0]} == "{item[1]}"' for item in conditions.items()])
-        result = dataframe.query(expr, inplace=inplace)
-        if not inplace:
-            return result
+        mask = cls._build_mask(dataframe, conditions)
+        if inplace:
+            dataframe.drop(dataframe.index[~mask], inplace=True)
+        else:
+            return dataframe.loc[mask]
 
     @staticmethod
-    def cli_args_to_dict(args: ap.Namespace) -> dict[str, str]:
+    def _build_mask(dataframe: pd.DataFrame,
+                    conditions: dict[str, str],
+                    cache: dict[tuple[str, str], np.ndarray] = None) -> np.ndarray:
+        """
+        Строит булеву маску строк, удовлетворяющих всем переданным условиям
+
+        :param dataframe: Дата фрейм с данными о расходах и доходах
+        :param conditions: Значения ячеек для фильтрации
+        :param cache: Опциональный словарь с уже вычисленными масками
+                      для пар колонка-значение. По умолчанию равен None
+        :return: Массив numpy с булевой маской строк
+        """
+        import numpy as np
+
+        mask = np.ones(len(dataframe), dtype=bool)
+        for col_name, value in conditions.items():
+            key = (col_name, value)
+            if cache is not None and key in cache:
+                condition_mask = cache[key]
+            else:
+                condition_mask = (dataframe[col_name] == value).to_numpy(dtype=bool, na_value=False)
+                if cache is not None:
+                    cache[key] = condition_mask
+            mask &= condition_mask
+        return mask
+
+    @staticmethod
+    def _exit_no_balance_data() -> None:
+        """
+        Сообщает об отсутствии записей для вычисления баланса и завершает работу.
+
+        :return: None
+        """
+        print('\nОшибка: Недостаточно данных для вычисления баланса.'
+              ' Отсутствуют доходы и расходы.')
+        raise SystemExit(2)
+
+    @classmethod
+    def cli_args_to_dict(cls, args: ap.Namespace) -> dict[str, str]:
         """
         Создает словарь со значениями, переданными пользователем
         в аргументах командной строки
 
         :param args: Аргументы командной строки
         """
-        result = {}
-        for attr in ('amount', 'category', 'date', 'description'):
-            if getattr(args, attr):
-                result[attr.capitalize()] = getattr(args, attr)
-        return result
+        return {cls._attr_to_col[attr]: value for attr, value in vars(args).items()
+                if attr in cls._attr_to_col and value is not None}
 
     @staticmethod
     def cell_values_to_string(values: Any):